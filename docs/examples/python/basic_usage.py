@@ -2,17 +2,29 @@
 Mataresit API - Python Examples
 
 This file demonstrates basic usage of the Mataresit API using Python.
-Install required dependencies: pip install requests python-dotenv
+Install required dependencies: pip install requests "httpx[http2]" msgspec ijson tqdm python-dotenv
 """
 
+import asyncio
+import functools
+import itertools
 import os
-import json
+import random
+import threading
 import time
+import uuid
+import httpx
+import ijson
+import msgspec
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union, Any
 from dotenv import load_dotenv
+from tqdm import tqdm
+from tqdm.asyncio import tqdm as async_tqdm
 
 # Load environment variables
 load_dotenv()
@@ -20,72 +32,401 @@ load_dotenv()
 MATARESIT_API_BASE = 'https://mpmkbtsufihzdelrlszs.supabase.co/functions/v1/external-api/api/v1'
 API_KEY = os.getenv('MATARESIT_API_KEY')  # Set your API key in .env file
 
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
 
-@dataclass
-class Receipt:
-    """Receipt data structure"""
+# Methods whose create/update/delete calls send an Idempotency-Key, so retries
+# cannot duplicate writes. Read-only POSTs such as /search are sent without one.
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Batch responses larger than this are parsed incrementally
+STREAM_THRESHOLD_BYTES = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Where the per-receipt results sit in a batch response
+BATCH_RESULT_PREFIXES = {'data.created.item': 'created', 'data.errors.item': 'errors'}
+
+POLL_INITIAL_DELAY = 0.5
+POLL_MAX_DELAY = 4.0
+
+# Seconds that idempotent GET responses stay cached, per endpoint
+GET_CACHE_TTLS = {
+    '/health': 30,
+    '/teams': 600,
+    '/analytics': 300,
+    '/analytics/summary': 300,
+    '/analytics/categories': 300
+}
+
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 60
+
+# Views of the comprehensive /analytics report, by the response field that holds them
+ANALYTICS_PARTS = {
+    'summary': 'summary',
+    'categories': 'categoryBreakdown',
+    'trends': 'trends',
+    'merchants': 'topMerchants',
+    'payment_methods': 'paymentMethods',
+    'insights': 'insights'
+}
+
+
+class Receipt(msgspec.Struct, omit_defaults=True,
+              rename={'payment_method': 'paymentMethod', 'full_text': 'fullText', 'team_id': 'teamId'}):
+    """Receipt data structure
+    
+    Encodes directly to the API request body; optional fields left as None
+    are not sent. currency is always sent, since endpoints differ in the
+    currency they assume.
+    """
     merchant: str
     date: str
     total: float
-    currency: str = 'USD'
+    # A default_factory is never omitted by omit_defaults, so this is always encoded
+    currency: str = msgspec.field(default_factory=lambda: 'USD')
     payment_method: Optional[str] = None
     category: Optional[str] = None
     full_text: Optional[str] = None
     team_id: Optional[str] = None
 
 
-@dataclass
-class Claim:
-    """Claim data structure"""
+class Claim(msgspec.Struct, omit_defaults=True, rename={'team_id': 'teamId'}):
+    """Claim data structure
+    
+    Optional fields left as None are not sent; currency and priority always are.
+    """
     team_id: str
     title: str
     amount: float
-    currency: str = 'USD'
+    currency: str = msgspec.field(default_factory=lambda: 'USD')
     description: Optional[str] = None
     category: Optional[str] = None
-    priority: str = 'medium'
+    priority: str = msgspec.field(default_factory=lambda: 'medium')
+
+
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder()
 
 
 class MataresitAPIError(Exception):
     """Custom exception for API errors"""
-    def __init__(self, message: str, status_code: int = None, error_code: str = None):
+    def __init__(self, message: str, status_code: int = None, error_code: str = None,
+                 retry_after: Optional[float] = None):
         self.message = message
         self.status_code = status_code
         self.error_code = error_code
+        self.retry_after = retry_after
         super().__init__(self.message)
 
 
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _with_idempotency_key(method: str, kwargs: Dict[str, Any], key: Optional[str] = None) -> Dict[str, Any]:
+    """Attach an Idempotency-Key header to write requests that lack one"""
+    if method in WRITE_METHODS:
+        headers = dict(kwargs.get('headers') or {})
+        headers.setdefault('Idempotency-Key', key or uuid.uuid4().hex)
+        kwargs['headers'] = headers
+    return kwargs
+
+
+def _parse_response(response: Any) -> Dict[str, Any]:
+    """Decode a requests/httpx response, raising MataresitAPIError on errors"""
+    try:
+        data = _json_decoder.decode(response.content)
+    except msgspec.DecodeError as e:
+        raise MataresitAPIError(f"Invalid response: {str(e)}", status_code=response.status_code) from e
+    
+    if response.status_code >= 400:
+        raise MataresitAPIError(
+            message=data.get('message', 'API request failed'),
+            status_code=response.status_code,
+            error_code=data.get('code'),
+            retry_after=_parse_retry_after(response.headers.get('Retry-After'))
+        )
+    
+    return data
+
+
+def _iter_batch_results(chunks: Iterable[bytes]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Incrementally parse a batch response into ('created' | 'errors', item) pairs
+    
+    The body is tokenized once and items are routed by their path. Only the
+    items completed by the current chunk are held in memory.
+    """
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events, use_float=True)
+    kind = item_prefix = builder = None
+    
+    for chunk in itertools.chain(chunks, (None,)):
+        if chunk is None:
+            parser.close()
+        else:
+            parser.send(chunk)
+        
+        for prefix, event, value in events:
+            if builder is None:
+                kind = BATCH_RESULT_PREFIXES.get(prefix)
+                if kind is None:
+                    continue
+                item_prefix = prefix
+                builder = ijson.ObjectBuilder()
+            
+            builder.event(event, value)
+            
+            # Keys of the item itself share its prefix; anything else there ends it
+            if prefix == item_prefix and event not in ('start_map', 'start_array', 'map_key'):
+                yield kind, builder.value
+                builder = None
+        
+        del events[:]
+
+
+async def _aiterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    """Iterate a sync or async iterable from async code"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def _conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, str]:
+    """Headers that let the server answer 304 when nothing has changed"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def _processing_status(receipt: Dict[str, Any]) -> str:
+    """Processing status of a receipt; GET /receipts/{id} returns the raw row"""
+    return receipt.get('processing_status') or receipt.get('processingStatus') or 'pending'
+
+
+def _retry_delay(retry_after: Optional[float], previous_delay: float) -> float:
+    """Seconds to wait before the next attempt
+    
+    Honors the server's Retry-After when given, otherwise uses decorrelated
+    jitter so that clients rate limited together do not retry together.
+    """
+    if retry_after is not None:
+        return min(RETRY_MAX_DELAY, retry_after)
+    return min(RETRY_MAX_DELAY, random.uniform(RETRY_BASE_DELAY, previous_delay * 3))
+
+
+def _response_retry_delay(response: Any, previous_delay: float) -> float:
+    """Seconds to wait before retrying a requests/httpx response"""
+    return _retry_delay(_parse_retry_after(response.headers.get('Retry-After')), previous_delay)
+
+
+class _RateLimitGate:
+    """Pause shared by every client using the same API key after a 429
+    
+    Rate limits apply to the API key rather than to a single request, so once
+    one caller is told to back off, other threads and coroutines using that
+    key wait too instead of spending their own requests discovering the same
+    limit. Clients with other keys are not held up.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+    
+    def block(self, delay: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+    
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+
+_rate_limit_gates: Dict[str, _RateLimitGate] = {}
+
+
+def _rate_limit_gate(api_key: str) -> _RateLimitGate:
+    """The gate shared by every client using api_key"""
+    return _rate_limit_gates.setdefault(api_key, _RateLimitGate())
+
+
+class _TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL
+    
+    Keys are tuples whose first element is the endpoint, so entries can be
+    invalidated by endpoint prefix after a write.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: tuple, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, prefix: str = '') -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0].startswith(prefix)]:
+                del self._entries[key]
+    
+    def cache_clear(self) -> None:
+        """Drop every entry, like functools.lru_cache's cache_clear()"""
+        with self._lock:
+            self._entries.clear()
+
+
+def _get_cache_key(endpoint: str, params: Optional[Dict[str, Any]]) -> tuple:
+    """Cache key for a GET request"""
+    return (endpoint, tuple(sorted((name, str(value)) for name, value in (params or {}).items())))
+
+
+def _analytics_bundle(report: Dict[str, Any], parts: Iterable[str]) -> Dict[str, Any]:
+    """Pick the requested views out of an /analytics report, keyed by part name"""
+    data = report['data']
+    return {part: data.get(ANALYTICS_PARTS.get(part, part)) for part in parts}
+
+
+def _search_cache_key(query: str, sources: Optional[List[str]], options: Dict[str, Any]) -> tuple:
+    """Cache key for a search, ignoring case, surrounding whitespace and argument order
+    
+    Options are keyed by their JSON encoding with sorted keys, so values that
+    are sent differently (5 and '5') never share an entry.
+    """
+    return (
+        query.strip().lower(),
+        tuple(sorted(sources or ())),
+        msgspec.json.encode(options, order='sorted')
+    )
+
+
 class MataresitAPI:
-    """Mataresit API client"""
+    """Mataresit API client
+    
+    The client is safe to share between threads. max_pool is the number of
+    connections kept per host and must be at least the number of threads
+    making requests at the same time; requests' default of 10 otherwise
+    becomes the throughput ceiling, with extra threads waiting for a free
+    connection.
     
-    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE):
+    GET responses for the endpoints in cache_ttls (GET_CACHE_TTLS by default)
+    are cached for that many seconds; pass cache_ttls={} to turn caching off.
+    Cached results are shared, so every caller gets the same dict and must
+    copy it before changing it.
+    """
+    
+    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE, max_pool: int = 50,
+                 cache_ttls: Optional[Dict[str, float]] = None, cache_size: int = 512):
         self.api_key = api_key
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.cache_ttls = dict(GET_CACHE_TTLS if cache_ttls is None else cache_ttls)
+        self._cache = _TTLCache(cache_size)
+        self.search_cache = _TTLCache(SEARCH_CACHE_SIZE)
+        self._json_headers = {
             'X-API-Key': api_key,
-            'Content-Type': 'application/json'
-        })
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self._json_headers)
+        
+        # Retries are handled by AdvancedMataresitAPI, not by urllib3
+        adapter = HTTPAdapter(pool_connections=max_pool, pool_maxsize=max_pool, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def invalidate(self, prefix: str = '') -> None:
+        """Drop cached GET responses for endpoints starting with prefix"""
+        self._cache.invalidate(prefix)
+    
+    def _invalidate_receipt_data(self) -> None:
+        self.invalidate('/receipts')
+        self.invalidate('/analytics')
+        self.search_cache.cache_clear()
     
     def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Make API request with error handling"""
+        ttl = self.cache_ttls.get(endpoint) if method == 'GET' else None
+        if ttl:
+            cache_key = _get_cache_key(endpoint, kwargs.get('params'))
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        data = _parse_response(self._send(method, endpoint, **kwargs))
+        
+        if ttl:
+            self._cache.set(cache_key, data, ttl)
+        return data
+    
+    def _request_stream(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Make API request and return the response with its body still unread"""
+        response = self._send(method, endpoint, stream=True, **kwargs)
+        
+        if response.status_code >= 400:
+            with response:
+                _parse_response(response)
+        
+        return response
+    
+    def _send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send the request behind _request and _request_stream"""
+        return self._request_raw(method, endpoint, **kwargs)
+    
+    def _request_raw(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Make API request and return the response without decoding it"""
         url = f"{self.base_url}{endpoint}"
         
-        try:
-            response = self.session.request(method, url, **kwargs)
-            data = response.json()
-            
-            if not response.ok:
-                raise MataresitAPIError(
-                    message=data.get('message', 'API request failed'),
-                    status_code=response.status_code,
-                    error_code=data.get('code')
-                )
-            
-            return data
+        # Encode with msgspec rather than letting requests use the stdlib encoder;
+        # Receipt and Claim structs are written straight to JSON bytes
+        if 'json' in kwargs:
+            kwargs['data'] = _json_encoder.encode(kwargs.pop('json'))
         
+        try:
+            return self.session.request(method, url, **kwargs)
         except requests.RequestException as e:
-            raise MataresitAPIError(f"Request failed: {str(e)}")
+            raise MataresitAPIError(f"Request failed: {str(e)}") from e
     
     def health_check(self) -> Dict[str, Any]:
         """Check API health"""
@@ -100,88 +441,107 @@ class MataresitAPI:
         """Get specific receipt"""
         return self._request('GET', f'/receipts/{receipt_id}')
     
-    def create_receipt(self, receipt: Receipt) -> Dict[str, Any]:
-        """Create new receipt"""
-        data = {
-            'merchant': receipt.merchant,
-            'date': receipt.date,
-            'total': receipt.total,
-            'currency': receipt.currency
-        }
-        
-        # Add optional fields
-        if receipt.payment_method:
-            data['paymentMethod'] = receipt.payment_method
-        if receipt.category:
-            data['category'] = receipt.category
-        if receipt.full_text:
-            data['fullText'] = receipt.full_text
-        if receipt.team_id:
-            data['teamId'] = receipt.team_id
+    def create_receipt(self, receipt: Receipt, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create new receipt
         
-        return self._request('POST', '/receipts', json=data)
+        Pass the same idempotency_key when repeating a create, so the server
+        does not store the receipt twice.
+        """
+        result = self._request(
+            'POST', '/receipts', json=receipt,
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+        self._invalidate_receipt_data()
+        return result
     
     def update_receipt(self, receipt_id: str, **updates) -> Dict[str, Any]:
         """Update receipt"""
-        return self._request('PUT', f'/receipts/{receipt_id}', json=updates)
+        result = self._request(
+            'PUT', f'/receipts/{receipt_id}', json=updates,
+            **_with_idempotency_key('PUT', {})
+        )
+        self._invalidate_receipt_data()
+        return result
     
     def delete_receipt(self, receipt_id: str) -> Dict[str, Any]:
         """Delete receipt"""
-        return self._request('DELETE', f'/receipts/{receipt_id}')
+        result = self._request(
+            'DELETE', f'/receipts/{receipt_id}',
+            **_with_idempotency_key('DELETE', {})
+        )
+        self._invalidate_receipt_data()
+        return result
     
-    def create_receipts_batch(self, receipts: List[Receipt]) -> Dict[str, Any]:
+    def create_receipts_batch(self, receipts: List[Receipt], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Create multiple receipts in batch"""
-        receipts_data = []
-        for receipt in receipts:
-            receipt_dict = {
-                'merchant': receipt.merchant,
-                'date': receipt.date,
-                'total': receipt.total,
-                'currency': receipt.currency
-            }
-            if receipt.payment_method:
-                receipt_dict['paymentMethod'] = receipt.payment_method
-            if receipt.category:
-                receipt_dict['category'] = receipt.category
-            if receipt.team_id:
-                receipt_dict['teamId'] = receipt.team_id
-            
-            receipts_data.append(receipt_dict)
+        result = self._request(
+            'POST', '/receipts/batch', json={'receipts': receipts},
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+        self._invalidate_receipt_data()
+        return result
+    
+    def stream_receipts_batch(self, receipts: List[Receipt],
+                              idempotency_key: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Create multiple receipts in batch, yielding results as they are parsed
         
-        return self._request('POST', '/receipts/batch', json={'receipts': receipts_data})
+        Yields ('created', receipt) and ('errors', error) pairs without holding
+        the whole response in memory. Small responses are decoded in one go.
+        """
+        response = self._request_stream(
+            'POST', '/receipts/batch', json={'receipts': receipts},
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+        self._invalidate_receipt_data()
+        
+        with response:
+            content_length = int(response.headers.get('Content-Length') or 0)
+            
+            try:
+                if 0 < content_length <= STREAM_THRESHOLD_BYTES:
+                    data = _parse_response(response)['data']
+                    yield from (('created', item) for item in data['created'])
+                    yield from (('errors', item) for item in data['errors'])
+                else:
+                    yield from _iter_batch_results(response.iter_content(STREAM_CHUNK_SIZE))
+            except ijson.JSONError as e:
+                raise MataresitAPIError(f"Invalid response: {str(e)}", status_code=response.status_code) from e
+            except requests.RequestException as e:
+                raise MataresitAPIError(f"Request failed: {str(e)}") from e
     
     # Claims methods
     def get_claims(self, **params) -> Dict[str, Any]:
         """Get claims with optional filtering"""
         return self._request('GET', '/claims', params=params)
     
-    def create_claim(self, claim: Claim) -> Dict[str, Any]:
+    def create_claim(self, claim: Claim, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Create new claim"""
-        data = {
-            'teamId': claim.team_id,
-            'title': claim.title,
-            'amount': claim.amount,
-            'currency': claim.currency,
-            'priority': claim.priority
-        }
-        
-        if claim.description:
-            data['description'] = claim.description
-        if claim.category:
-            data['category'] = claim.category
-        
-        return self._request('POST', '/claims', json=data)
+        return self._request(
+            'POST', '/claims', json=claim,
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
     
     # Search methods
     def search(self, query: str, sources: List[str] = None, **options) -> Dict[str, Any]:
-        """Perform semantic search"""
+        """Perform semantic search
+        
+        Results are cached for SEARCH_CACHE_TTL seconds; call
+        search_cache.cache_clear() to force fresh results.
+        """
+        cache_key = _search_cache_key(query, sources, options)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         data = {'query': query}
         
         if sources:
             data['sources'] = sources
         
         data.update(options)
-        return self._request('POST', '/search', json=data)
+        result = self._request('POST', '/search', json=data)
+        self.search_cache.set(cache_key, result, SEARCH_CACHE_TTL)
+        return result
     
     # Analytics methods
     def get_analytics(self, **params) -> Dict[str, Any]:
@@ -196,6 +556,22 @@ class MataresitAPI:
         """Get category breakdown"""
         return self._request('GET', '/analytics/categories', params=params)
     
+    def get_analytics_bundle(self, start_date: str, end_date: str, currency: str = 'USD',
+                             parts: Tuple[str, ...] = ('summary', 'categories')) -> Dict[str, Any]:
+        """Get several analytics views for one date range in a single request
+        
+        Returns a dict keyed by part name (see ANALYTICS_PARTS). Servers that
+        reject ``expand`` are asked for the full report, which holds every part.
+        """
+        params = {'start_date': start_date, 'end_date': end_date, 'currency': currency}
+        try:
+            report = self.get_analytics(expand=','.join(parts), **params)
+        except MataresitAPIError as e:
+            if e.status_code != 400:
+                raise
+            report = self.get_analytics(**params)
+        return _analytics_bundle(report, parts)
+    
     # Teams methods
     def get_teams(self) -> Dict[str, Any]:
         """Get user's teams"""
@@ -209,25 +585,50 @@ class MataresitAPI:
 class AdvancedMataresitAPI(MataresitAPI):
     """Advanced API client with retry logic and additional features"""
     
-    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE, max_retries: int = 3):
-        super().__init__(api_key, base_url)
+    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE, max_retries: int = 3,
+                 max_pool: int = 50, cache_ttls: Optional[Dict[str, float]] = None, cache_size: int = 512):
+        super().__init__(api_key, base_url, max_pool, cache_ttls, cache_size)
+        if max_retries < 1:
+            raise ValueError("max_retries must be at least 1")
         self.max_retries = max_retries
+        self._rate_limit_gate = _rate_limit_gate(api_key)
+    
+    def _send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send the request, retrying rate limits and transient failures"""
+        return self._request_with_retry(method, endpoint, **kwargs)
     
-    def _request_with_retry(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Make API request with retry logic"""
+    def _request_with_retry(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Make API request with retry logic
+        
+        Retries are decided from the status code and headers alone, so only
+        the response that is finally returned has its body decoded.
+        """
+        # Write methods set their Idempotency-Key before this, so every attempt
+        # carries the same key and the server can drop duplicates
+        delay = RETRY_BASE_DELAY
+        
         for attempt in range(1, self.max_retries + 1):
-            try:
-                return self._request(method, endpoint, **kwargs)
+            time.sleep(self._rate_limit_gate.remaining())
             
+            try:
+                response = self._request_raw(method, endpoint, **kwargs)
             except MataresitAPIError as e:
-                if e.status_code == 429 and attempt < self.max_retries:  # Rate limited
-                    delay = 2 ** attempt  # Exponential backoff
-                    print(f"Rate limited, retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue
-                raise
-        
-        raise MataresitAPIError("Max retries exceeded")
+                if attempt >= self.max_retries or not isinstance(e.__cause__, requests.ConnectionError):
+                    raise
+                reason = e.message
+                delay = _retry_delay(None, delay)
+            else:
+                if attempt >= self.max_retries or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                
+                response.close()
+                reason = response.status_code
+                delay = _response_retry_delay(response, delay)
+                if response.status_code == 429:
+                    self._rate_limit_gate.block(delay)
+            
+            print(f"Request failed ({reason}), retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
     
     def upload_receipt_with_processing(self, receipt: Receipt, wait_for_processing: bool = True) -> Dict[str, Any]:
         """Upload receipt and optionally wait for processing"""
@@ -241,51 +642,585 @@ class AdvancedMataresitAPI(MataresitAPI):
         return result
     
     def wait_for_processing(self, receipt_id: str, max_wait: int = 30) -> Dict[str, Any]:
-        """Wait for receipt processing to complete"""
-        start_time = time.time()
+        """Wait for receipt processing to complete
         
-        while time.time() - start_time < max_wait:
-            receipt = self.get_receipt(receipt_id)
-            status = receipt['data'].get('processingStatus', 'pending')
+        Polls with exponential backoff and sends the validators from the last
+        response, so polls of an unchanged receipt come back as an empty 304.
+        """
+        start_time = time.monotonic()
+        delay = POLL_INITIAL_DELAY
+        etag = last_modified = None
+        
+        while time.monotonic() - start_time < max_wait:
+            response = self._request_raw(
+                'GET', f'/receipts/{receipt_id}',
+                headers=_conditional_headers(etag, last_modified)
+            )
             
-            if status == 'complete':
-                return receipt
-            elif status == 'failed':
-                raise MataresitAPIError("Receipt processing failed")
+            # Rate limits and transient server errors just push the next poll back
+            if response.status_code in RETRY_STATUS_CODES:
+                delay = max(delay, _parse_retry_after(response.headers.get('Retry-After')) or 0.0)
+            elif response.status_code != 304:
+                receipt = _parse_response(response)
+                etag = response.headers.get('ETag', etag)
+                last_modified = response.headers.get('Last-Modified', last_modified)
+                status = _processing_status(receipt['data'])
+                
+                if status == 'complete':
+                    return receipt
+                elif status.startswith('failed'):
+                    raise MataresitAPIError(f"Receipt processing failed ({status})")
             
-            time.sleep(2)  # Wait 2 seconds before checking again
+            time.sleep(delay)
+            delay = min(POLL_MAX_DELAY, delay * 2)
         
         raise MataresitAPIError("Receipt processing timeout")
     
     def bulk_upload_with_progress(self, receipts: List[Receipt], batch_size: int = 10) -> Dict[str, Any]:
         """Upload receipts in batches with progress tracking"""
         total_receipts = len(receipts)
+        total_batches = -(-total_receipts // batch_size)
         successful = []
         failed = []
         
-        print(f"Uploading {total_receipts} receipts in batches of {batch_size}...")
+        with tqdm(total=total_receipts, unit='receipt',
+                  desc=f"Uploading in {total_batches} batches of {batch_size}") as progress:
+            for batch_num, start in enumerate(range(0, total_receipts, batch_size), 1):
+                batch = receipts[start:start + batch_size]
+                
+                # Results count only once the whole response has been read, so a
+                # batch that breaks off partway is reported as failed, not both
+                batch_created = []
+                batch_errors = []
+                try:
+                    for kind, item in self.stream_receipts_batch(batch):
+                        (batch_created if kind == 'created' else batch_errors).append(item)
+                
+                except MataresitAPIError as e:
+                    progress.write(f"Batch {batch_num} failed: {e.message}")
+                    failed.append({'error': e.message, 'batch': batch_num})
+                else:
+                    successful.extend(batch_created)
+                    failed.extend(batch_errors)
+                
+                progress.update(len(batch))
+                progress.set_postfix(successful=len(successful), failed=len(failed))
         
-        for i in range(0, total_receipts, batch_size):
-            batch = receipts[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_receipts + batch_size - 1) // batch_size
+        return {
+            'total': total_receipts,
+            'successful': len(successful),
+            'failed': len(failed),
+            'successful_receipts': successful,
+            'failed_receipts': failed
+        }
+
+
+class AsyncMataresitAPI:
+    """Async Mataresit API client
+    
+    Built on httpx with HTTP/2, so many concurrent requests are multiplexed
+    over a single connection. Use it as an async context manager:
+    
+        async with AsyncMataresitAPI(API_KEY) as api:
+            health = await api.health_check()
+    
+    GET responses are cached as in MataresitAPI, and cached results are
+    shared between callers in the same way.
+    """
+    
+    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE, max_connections: int = 100,
+                 cache_ttls: Optional[Dict[str, float]] = None, cache_size: int = 512):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.cache_ttls = dict(GET_CACHE_TTLS if cache_ttls is None else cache_ttls)
+        self._cache = _TTLCache(cache_size)
+        self.search_cache = _TTLCache(SEARCH_CACHE_SIZE)
+        self._json_headers = {
+            'X-API-Key': api_key,
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def __aenter__(self) -> 'AsyncMataresitAPI':
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=self._json_headers,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=30.0
+        )
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def invalidate(self, prefix: str = '') -> None:
+        """Drop cached GET responses for endpoints starting with prefix"""
+        self._cache.invalidate(prefix)
+    
+    def _invalidate_receipt_data(self) -> None:
+        self.invalidate('/receipts')
+        self.invalidate('/analytics')
+        self.search_cache.cache_clear()
+    
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make API request with error handling"""
+        ttl = self.cache_ttls.get(endpoint) if method == 'GET' else None
+        if ttl:
+            cache_key = _get_cache_key(endpoint, kwargs.get('params'))
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        data = _parse_response(await self._send(method, endpoint, **kwargs))
+        
+        if ttl:
+            self._cache.set(cache_key, data, ttl)
+        return data
+    
+    async def _send(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Send the request behind _request"""
+        return await self._request_raw(method, endpoint, **kwargs)
+    
+    async def _request_raw(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Make API request and return the response without decoding it"""
+        if self._client is None:
+            raise MataresitAPIError("Client is not open, use 'async with AsyncMataresitAPI(...)'")
+        
+        url = f"{self.base_url}{endpoint}"
+        
+        # Encode with msgspec rather than letting httpx use the stdlib encoder;
+        # Receipt and Claim structs are written straight to JSON bytes
+        if 'json' in kwargs:
+            kwargs['content'] = _json_encoder.encode(kwargs.pop('json'))
+        
+        try:
+            return await self._client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            raise MataresitAPIError(f"Request failed: {str(e)}") from e
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Check API health"""
+        return await self._request('GET', '/health')
+    
+    # Receipt methods
+    async def get_receipts(self, **params) -> Dict[str, Any]:
+        """Get receipts with optional filtering"""
+        return await self._request('GET', '/receipts', params=params)
+    
+    async def get_receipt(self, receipt_id: str) -> Dict[str, Any]:
+        """Get specific receipt"""
+        return await self._request('GET', f'/receipts/{receipt_id}')
+    
+    async def create_receipt(self, receipt: Receipt, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create new receipt"""
+        result = await self._request(
+            'POST', '/receipts', json=receipt,
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+        self._invalidate_receipt_data()
+        return result
+    
+    async def update_receipt(self, receipt_id: str, **updates) -> Dict[str, Any]:
+        """Update receipt"""
+        result = await self._request(
+            'PUT', f'/receipts/{receipt_id}', json=updates,
+            **_with_idempotency_key('PUT', {})
+        )
+        self._invalidate_receipt_data()
+        return result
+    
+    async def delete_receipt(self, receipt_id: str) -> Dict[str, Any]:
+        """Delete receipt"""
+        result = await self._request(
+            'DELETE', f'/receipts/{receipt_id}',
+            **_with_idempotency_key('DELETE', {})
+        )
+        self._invalidate_receipt_data()
+        return result
+    
+    async def create_receipts_batch(self, receipts: List[Receipt],
+                                    idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create multiple receipts in batch"""
+        result = await self._request(
+            'POST', '/receipts/batch', json={'receipts': receipts},
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+        self._invalidate_receipt_data()
+        return result
+    
+    # Claims methods
+    async def get_claims(self, **params) -> Dict[str, Any]:
+        """Get claims with optional filtering"""
+        return await self._request('GET', '/claims', params=params)
+    
+    async def create_claim(self, claim: Claim, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create new claim"""
+        return await self._request(
+            'POST', '/claims', json=claim,
+            **_with_idempotency_key('POST', {}, idempotency_key)
+        )
+    
+    # Search methods
+    async def search(self, query: str, sources: List[str] = None, **options) -> Dict[str, Any]:
+        """Perform semantic search
+        
+        Results are cached for SEARCH_CACHE_TTL seconds; call
+        search_cache.cache_clear() to force fresh results.
+        """
+        cache_key = _search_cache_key(query, sources, options)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        data = {'query': query}
+        
+        if sources:
+            data['sources'] = sources
+        
+        data.update(options)
+        result = await self._request('POST', '/search', json=data)
+        self.search_cache.set(cache_key, result, SEARCH_CACHE_TTL)
+        return result
+    
+    # Analytics methods
+    async def get_analytics(self, **params) -> Dict[str, Any]:
+        """Get comprehensive analytics"""
+        return await self._request('GET', '/analytics', params=params)
+    
+    async def get_spending_summary(self, **params) -> Dict[str, Any]:
+        """Get spending summary"""
+        return await self._request('GET', '/analytics/summary', params=params)
+    
+    async def get_category_analytics(self, **params) -> Dict[str, Any]:
+        """Get category breakdown"""
+        return await self._request('GET', '/analytics/categories', params=params)
+    
+    async def get_analytics_bundle(self, start_date: str, end_date: str, currency: str = 'USD',
+                                   parts: Tuple[str, ...] = ('summary', 'categories')) -> Dict[str, Any]:
+        """Get several analytics views for one date range in a single request"""
+        params = {'start_date': start_date, 'end_date': end_date, 'currency': currency}
+        try:
+            report = await self.get_analytics(expand=','.join(parts), **params)
+        except MataresitAPIError as e:
+            if e.status_code != 400:
+                raise
+            report = await self.get_analytics(**params)
+        return _analytics_bundle(report, parts)
+    
+    # Teams methods
+    async def get_teams(self) -> Dict[str, Any]:
+        """Get user's teams"""
+        return await self._request('GET', '/teams')
+    
+    async def get_team_stats(self, team_id: str) -> Dict[str, Any]:
+        """Get team statistics"""
+        return await self._request('GET', f'/teams/{team_id}/stats')
+
+
+def _fail_futures(items: List[tuple], error: Exception) -> None:
+    """Fail the futures of (receipt, future) items that are still waiting"""
+    for _, future in items:
+        if not future.done():
+            future.set_exception(error)
+
+
+class ReceiptBatcher:
+    """Coalesce individual receipt creations into batch requests
+    
+    Receipts submitted from any number of coroutines are queued and sent as a
+    single /receipts/batch request once max_batch_size receipts are waiting or
+    the oldest one has waited max_queue_time seconds. Up to `concurrency`
+    batch requests are in flight at the same time.
+    """
+    
+    def __init__(self, api: 'AsyncMataresitAPI', max_batch_size: int = 50,
+                 max_queue_time: float = 0.2, concurrency: int = 4):
+        self.api = api
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+        self._closing = False
+    
+    async def submit(self, receipt: Receipt) -> Dict[str, Any]:
+        """Queue a receipt and wait for the created receipt data"""
+        if self._closing:
+            raise MataresitAPIError("Receipt batcher is closing")
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._collect())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((receipt, future))
+        return await future
+    
+    async def aclose(self) -> None:
+        """Send every queued receipt and wait for all batches to finish
+        
+        Receipts submitted while closing are rejected with MataresitAPIError.
+        """
+        self._closing = True
+        try:
+            if self._worker is not None:
+                # Queued after every waiting receipt, so none of them are dropped
+                await self._queue.put(None)
+                await self._worker
+                self._worker = None
+            
+            leftover = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    leftover.append(item)
+            _fail_futures(leftover, MataresitAPIError("Receipt batcher closed before sending the receipt"))
             
-            print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} receipts)...")
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        finally:
+            self._closing = False
+    
+    async def _collect(self) -> None:
+        """Group queued receipts into batches until aclose() queues None"""
+        loop = asyncio.get_running_loop()
+        closing = False
+        
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                return
+            
+            items = [item]
+            deadline = loop.time() + self.max_queue_time
+            
+            while len(items) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                items.append(item)
+            
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._process_batch(items))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    async def _process_batch(self, items: List[tuple]) -> None:
+        try:
+            result = await self.api.create_receipts_batch([receipt for receipt, _ in items])
+            
+            # Errors carry the index of the failed receipt; created receipts follow
+            # the order of the remaining ones
+            errors = {error['index']: error for error in result['data']['errors']}
+            created = iter(result['data']['created'])
+            
+            for index, (_, future) in enumerate(items):
+                error = errors.get(index)
+                created_receipt = None if error else next(created, None)
+                
+                if future.done():
+                    continue
+                if error:
+                    future.set_exception(MataresitAPIError(error['error']))
+                else:
+                    future.set_result(created_receipt)
+        except MataresitAPIError as e:
+            _fail_futures(items, e)
+        except Exception as e:
+            _fail_futures(items, MataresitAPIError(f"Invalid batch response: {str(e)}"))
+        finally:
+            self._semaphore.release()
+
+
+class AsyncAdvancedMataresitAPI(AsyncMataresitAPI):
+    """Async API client with retry logic, batching and concurrent bulk uploads"""
+    
+    def __init__(self, api_key: str, base_url: str = MATARESIT_API_BASE, max_connections: int = 100,
+                 max_retries: int = 3, max_batch_size: int = 50, max_queue_time: float = 0.2,
+                 batch_concurrency: int = 4, cache_ttls: Optional[Dict[str, float]] = None,
+                 cache_size: int = 512):
+        super().__init__(api_key, base_url, max_connections, cache_ttls, cache_size)
+        if max_retries < 1:
+            raise ValueError("max_retries must be at least 1")
+        self.max_retries = max_retries
+        self._rate_limit_gate = _rate_limit_gate(api_key)
+        self._batcher = ReceiptBatcher(self, max_batch_size, max_queue_time, batch_concurrency)
+    
+    async def _send(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Send the request, retrying rate limits and transient failures
+        
+        Retries are decided from the status code and headers alone, so only
+        the response that is finally returned has its body decoded.
+        """
+        # Write methods set their Idempotency-Key before this, so every attempt
+        # carries the same key and the server can drop duplicates
+        delay = RETRY_BASE_DELAY
+        
+        for attempt in range(1, self.max_retries + 1):
+            await asyncio.sleep(self._rate_limit_gate.remaining())
             
             try:
-                result = self.create_receipts_batch(batch)
-                successful.extend(result['data']['created'])
-                failed.extend(result['data']['errors'])
+                response = await self._request_raw(method, endpoint, **kwargs)
+            except MataresitAPIError as e:
+                if attempt >= self.max_retries or not isinstance(e.__cause__, (httpx.ConnectError, httpx.ConnectTimeout)):
+                    raise
+                reason = e.message
+                delay = _retry_delay(None, delay)
+            else:
+                if attempt >= self.max_retries or response.status_code not in RETRY_STATUS_CODES:
+                    return response
                 
-                print(f"Batch {batch_num} complete: {len(result['data']['created'])} successful, {len(result['data']['errors'])} failed")
+                reason = response.status_code
+                delay = _response_retry_delay(response, delay)
+                if response.status_code == 429:
+                    self._rate_limit_gate.block(delay)
+            
+            print(f"Request failed ({reason}), retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+    
+    async def aclose(self) -> None:
+        """Flush pending batches and close the underlying connection pool"""
+        await self._batcher.aclose()
+        await super().aclose()
+    
+    async def upload_receipt_with_processing(self, receipt: Receipt, wait_for_processing: bool = True) -> Dict[str, Any]:
+        """Upload receipt and optionally wait for processing"""
+        result = await self.create_receipt(receipt)
+        receipt_id = result['data']['id']
+        
+        if wait_for_processing:
+            return await self.wait_for_processing(receipt_id)
+        
+        return result
+    
+    async def upload_receipts_with_processing(self, receipts: List[Receipt]) -> List[Any]:
+        """Upload receipts and wait for all of them to finish processing
+        
+        Creates and polls for different receipts overlap, so one receipt's
+        polling backoff does not hold up the others. Returns the processed
+        receipt or the raised exception for each receipt, in order.
+        """
+        return await asyncio.gather(
+            *(self.upload_receipt_with_processing(receipt) for receipt in receipts),
+            return_exceptions=True
+        )
+    
+    async def wait_for_processing(self, receipt_id: str, max_wait: int = 30) -> Dict[str, Any]:
+        """Wait for receipt processing to complete without blocking the event loop"""
+        start_time = time.monotonic()
+        delay = POLL_INITIAL_DELAY
+        etag = last_modified = None
+        
+        while time.monotonic() - start_time < max_wait:
+            response = await self._request_raw(
+                'GET', f'/receipts/{receipt_id}',
+                headers=_conditional_headers(etag, last_modified)
+            )
+            
+            # Rate limits and transient server errors just push the next poll back
+            if response.status_code in RETRY_STATUS_CODES:
+                delay = max(delay, _parse_retry_after(response.headers.get('Retry-After')) or 0.0)
+            elif response.status_code != 304:
+                receipt = _parse_response(response)
+                etag = response.headers.get('ETag', etag)
+                last_modified = response.headers.get('Last-Modified', last_modified)
+                status = _processing_status(receipt['data'])
                 
-            except MataresitAPIError as e:
-                print(f"Batch {batch_num} failed: {e.message}")
-                failed.extend([{'error': e.message, 'batch': batch_num}])
+                if status == 'complete':
+                    return receipt
+                elif status.startswith('failed'):
+                    raise MataresitAPIError(f"Receipt processing failed ({status})")
             
-            # Small delay between batches to avoid rate limiting
-            if i + batch_size < total_receipts:
-                time.sleep(1)
+            await asyncio.sleep(delay)
+            delay = min(POLL_MAX_DELAY, delay * 2)
+        
+        raise MataresitAPIError("Receipt processing timeout")
+    
+    async def submit_receipt(self, receipt: Receipt) -> Dict[str, Any]:
+        """Create a receipt through the shared batcher"""
+        return await self._batcher.submit(receipt)
+    
+    async def bulk_upload_stream(self, receipts: Union[Iterable[Receipt], AsyncIterable[Receipt]]) -> Dict[str, Any]:
+        """Upload receipts from a sync or async iterable through the batcher
+        
+        Only enough receipts to fill every concurrent batch are held at once,
+        so memory stays flat however long the input is. Created receipts are
+        counted and their totals summed rather than collected.
+        """
+        window = asyncio.Semaphore(self._batcher.max_batch_size * self._batcher.concurrency)
+        in_flight = set()
+        failed = []
+        successful = total_receipts = 0
+        total_amount = 0.0
+        
+        async def upload(index: int, receipt: Receipt) -> None:
+            nonlocal successful, total_amount
+            try:
+                await self.submit_receipt(receipt)
+                successful += 1
+                total_amount += receipt.total
+            except MataresitAPIError as e:
+                failed.append({'index': index, 'error': e.message})
+            finally:
+                window.release()
+        
+        async for receipt in _aiterate(receipts):
+            await window.acquire()
+            task = asyncio.create_task(upload(total_receipts, receipt))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            total_receipts += 1
+        
+        await asyncio.gather(*in_flight)
+        
+        return {
+            'total': total_receipts,
+            'successful': successful,
+            'failed': len(failed),
+            'total_amount': total_amount,
+            'failed_receipts': failed
+        }
+    
+    async def bulk_upload_with_progress(self, receipts: List[Receipt]) -> Dict[str, Any]:
+        """Upload receipts through the batcher with progress tracking"""
+        total_receipts = len(receipts)
+        successful = []
+        failed = []
+        
+        async def upload(receipt: Receipt) -> Any:
+            try:
+                return await self.submit_receipt(receipt)
+            except MataresitAPIError as e:
+                return e
+        
+        results = await async_tqdm.gather(
+            *(upload(receipt) for receipt in receipts),
+            total=total_receipts, unit='receipt',
+            desc=f"Uploading in batches of up to {self._batcher.max_batch_size}"
+        )
+        
+        for index, result in enumerate(results):
+            if isinstance(result, MataresitAPIError):
+                failed.append({'index': index, 'error': result.message})
+            else:
+                successful.append(result)
         
         return {
             'total': total_receipts,
@@ -296,9 +1231,44 @@ class AdvancedMataresitAPI(MataresitAPI):
         }
 
 
+# Create one client per API key and reuse it. Every client owns its own
+# connection pool, so each extra instance pays for a new TCP/TLS handshake
+# and throws away the warm connections (and response cache) of the others.
+@functools.lru_cache(maxsize=8)
+def get_client(api_key: str = API_KEY) -> AdvancedMataresitAPI:
+    """Shared sync client for an API key
+    
+    Change what it caches through its cache_ttls, e.g. get_client().cache_ttls.clear().
+    """
+    return AdvancedMataresitAPI(api_key)
+
+
+_async_clients: Dict[str, AsyncAdvancedMataresitAPI] = {}
+
+
+async def get_async_client(api_key: str = API_KEY) -> AsyncAdvancedMataresitAPI:
+    """Shared async client for an API key
+    
+    The client is bound to the running event loop, so call close_async_clients()
+    before that loop shuts down.
+    """
+    client = _async_clients.get(api_key)
+    if client is None:
+        client = await AsyncAdvancedMataresitAPI(api_key).__aenter__()
+        _async_clients[api_key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close every shared async client"""
+    while _async_clients:
+        _, client = _async_clients.popitem()
+        await client.aclose()
+
+
 def basic_examples():
     """Basic usage examples"""
-    api = MataresitAPI(API_KEY)
+    api = get_client()
     
     try:
         # Health check
@@ -360,7 +1330,7 @@ def basic_examples():
 
 def advanced_examples():
     """Advanced usage examples"""
-    api = AdvancedMataresitAPI(API_KEY)
+    api = get_client()
     
     try:
         # Batch upload with progress
@@ -384,13 +1354,13 @@ def advanced_examples():
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30)
         
-        analytics = api.get_analytics(
+        analytics = api.get_analytics_bundle(
             start_date=start_date.strftime("%Y-%m-%d"),
             end_date=end_date.strftime("%Y-%m-%d")
         )
         
-        summary = analytics['data']['summary']
-        categories = analytics['data']['categoryBreakdown']
+        summary = analytics['summary']
+        categories = analytics['categories']
         
         print(f"Monthly Spending Report ({start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')})")
         print(f"Total Amount: ${summary['totalAmount']:.2f}")
@@ -407,9 +1377,21 @@ def advanced_examples():
         print(f"Unexpected error: {str(e)}")
 
 
-def real_world_integration():
+def receipts_iter(rows: Iterable[Dict[str, Any]]) -> Iterator[Receipt]:
+    """Turn expense rows (e.g. from csv.DictReader) into receipts one at a time"""
+    for item in rows:
+        yield Receipt(
+            merchant=item["merchant"],
+            date=item["date"],
+            total=float(item["amount"]),  # csv.DictReader yields strings
+            category=item["category"],
+            currency="USD"
+        )
+
+
+async def real_world_integration():
     """Real-world integration example"""
-    api = AdvancedMataresitAPI(API_KEY)
+    api = await get_async_client()
     
     # Simulate processing receipts from a CSV file or database
     expense_data = [
@@ -424,46 +1406,25 @@ def real_world_integration():
         print("=== Real-World Integration Example ===")
         print(f"Processing {len(expense_data)} expense records...")
         
-        # Convert to Receipt objects
-        receipts = [
-            Receipt(
-                merchant=item["merchant"],
-                date=item["date"],
-                total=item["amount"],
-                category=item["category"],
-                currency="USD"
-            )
-            for item in expense_data
-        ]
-        
-        # Upload with error handling
-        successful_uploads = []
-        failed_uploads = []
-        
-        for i, receipt in enumerate(receipts, 1):
-            try:
-                print(f"Uploading receipt {i}/{len(receipts)}: {receipt.merchant}")
-                result = api.create_receipt(receipt)
-                successful_uploads.append(result['data'])
-                print(f"  ✓ Success: {result['data']['id']}")
-                
-            except MataresitAPIError as e:
-                failed_uploads.append({'receipt': receipt, 'error': e.message})
-                print(f"  ✗ Failed: {e.message}")
+        # Receipts are built lazily and streamed into batched uploads, so a
+        # large CSV or database cursor is never held in memory as a whole
+        result = await api.bulk_upload_stream(receipts_iter(expense_data))
         
         # Summary
         print(f"\nUpload Summary:")
-        print(f"Successful: {len(successful_uploads)}")
-        print(f"Failed: {len(failed_uploads)}")
+        print(f"Successful: {result['successful']}")
+        print(f"Failed: {result['failed']}")
         
-        if successful_uploads:
-            total_amount = sum(r['total'] for r in successful_uploads)
-            print(f"Total amount processed: ${total_amount:.2f}")
+        if result['successful']:
+            print(f"Total amount processed: ${result['total_amount']:.2f}")
+        
+        for failure in result['failed_receipts']:
+            print(f"  ✗ Record {failure['index'] + 1}: {failure['error']}")
         
         # Generate insights
-        if len(successful_uploads) >= 3:
+        if result['successful'] >= 3:
             print("\n=== Generating Insights ===")
-            search_result = api.search("office supplies and transportation expenses")
+            search_result = await api.search("office supplies and transportation expenses")
             
             if search_result['data']['results']:
                 print("Related expenses found:")
@@ -474,6 +1435,53 @@ def real_world_integration():
         print(f"Integration failed: {str(e)}")
 
 
+async def async_examples():
+    """Async usage examples"""
+    api = await get_async_client()
+    
+    try:
+        print("\n=== Async Batch Upload Example ===")
+        receipts = [
+            Receipt("Staples", "2025-01-16", 42.10, "USD", "Credit Card", "Office Supplies"),
+            Receipt("Lyft", "2025-01-16", 18.25, "USD", "Credit Card", "Transportation"),
+            Receipt("Costco", "2025-01-16", 154.30, "USD", "Debit Card", "Groceries"),
+            Receipt("Chevron", "2025-01-16", 51.75, "USD", "Credit Card", "Transportation"),
+            Receipt("Apple Store", "2025-01-16", 99.00, "USD", "Credit Card", "Electronics")
+        ]
+        
+        result = await api.bulk_upload_with_progress(receipts)
+        print(f"\nAsync bulk upload complete:")
+        print(f"Total: {result['total']}")
+        print(f"Successful: {result['successful']}")
+        print(f"Failed: {result['failed']}")
+        
+        print("\n=== Upload And Wait For Processing ===")
+        to_process = [
+            Receipt("Walgreens", "2025-01-17", 23.40, "USD", "Credit Card", "Health"),
+            Receipt("Delta", "2025-01-17", 312.00, "USD", "Credit Card", "Travel")
+        ]
+        processed = await api.upload_receipts_with_processing(to_process)
+        for receipt, outcome in zip(to_process, processed):
+            if isinstance(outcome, Exception):
+                print(f"  ✗ {receipt.merchant}: {outcome}")
+            else:
+                print(f"  ✓ {receipt.merchant}: {_processing_status(outcome['data'])}")
+    
+    except MataresitAPIError as e:
+        print(f"API Error: {e.message}")
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+
+
+async def async_main():
+    """Run the async examples on one event loop"""
+    try:
+        await real_world_integration()
+        await async_examples()
+    finally:
+        await close_async_clients()
+
+
 if __name__ == "__main__":
     if not API_KEY:
         print("Error: MATARESIT_API_KEY environment variable not set")
@@ -484,6 +1492,6 @@ if __name__ == "__main__":
     
     basic_examples()
     advanced_examples()
-    real_world_integration()
+    asyncio.run(async_main())
     
     print("\n=== All Examples Complete ===")